@@ -1,17 +1,29 @@
 import socket
+import sys
 import asyncio
-import inspect
-import random
-import tkinter as tk
-from tkinter import ttk, scrolledtext
+import posixpath
 import threading
-import queue
 import argparse
 import logging
-from dataclasses import dataclass
-from typing import Optional, Dict, List, Protocol, runtime_checkable
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Iterable, Optional, Dict, List, Protocol, runtime_checkable
 from abc import ABC, abstractmethod
 from datetime import datetime
+from enum import Enum
+
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+try:
+    import tkinter as tk
+    from tkinter import ttk
+except ImportError:
+    # Headless interpreters (CI, minimal containers) may lack Tk support;
+    # the server itself never needs it, only the control panel GUI does.
+    tk = None
 
 @dataclass
 class FileInfo:
@@ -19,22 +31,50 @@ class FileInfo:
     size: int
     modified: datetime
     content: Optional[bytes] = None
+    formatted_mtime: str = field(init=False)
+
+    def __post_init__(self):
+        self.formatted_mtime = self.modified.strftime('%b %d %H:%M')
 
 @dataclass
 class DirectoryInfo:
-    files: List[FileInfo]
+    files: Dict[str, FileInfo]
     dirs: List[str]
 
-@dataclass
+@dataclass(slots=True)
 class FTPResponse:
     code: int
     message: str
+    _encoded: Optional[bytes] = field(default=None, init=False, repr=False, compare=False)
 
     def encode(self) -> bytes:
-        return f"{self.code} {self.message}\r\n".encode()
+        encoded = self._encoded
+        if encoded is None:
+            encoded = self._encoded = f"{self.code} {self.message}\r\n".encode()
+        return encoded
+
+
+# Shared instances for the static replies so each is formatted and encoded
+# only once for the lifetime of the process.
+RESP_WELCOME = FTPResponse(220, "Welcome to FTP Mock Server")
+RESP_USER_OK = FTPResponse(331, "User name okay, need password")
+RESP_LOGGED_IN = FTPResponse(230, "User logged in")
+RESP_TYPE_I = FTPResponse(200, "Type set to I")
+RESP_TRANSFER_COMPLETE = FTPResponse(226, "Transfer complete")
+RESP_GOODBYE = FTPResponse(221, "Goodbye")
+RESP_UNKNOWN_COMMAND = FTPResponse(500, "Unknown command")
+
+
+class DataMode(Enum):
+    """What the next data connection should do."""
+    IDLE = 0
+    SEND = 1     # LIST / RETR: write pending_data to the client
+    RECEIVE = 2  # STOR: read the upload from the client
 
 class IFileSystem(ABC):
     """Interface for file system operations."""
+    __slots__ = ()
+
     @abstractmethod
     def get_dir_info(self, path: str) -> Optional[DirectoryInfo]:
         pass
@@ -47,7 +87,13 @@ class IFileSystem(ABC):
     def store_file(self, path: str, content: bytes) -> None:
         pass
 
+    @abstractmethod
+    def get_listing_bytes(self, path: str) -> bytes:
+        pass
+
 class IMockBehavior(ABC):
+    __slots__ = ()
+
     @abstractmethod
     def should_return_error(self, command: str) -> bool:
         pass
@@ -57,10 +103,12 @@ class IMockBehavior(ABC):
         pass
 
     @abstractmethod
-    def log_message(self, message: str) -> None:
+    def log_message(self, message: str, *args) -> None:
         pass
 
 class IFTPCommandHandler(ABC):
+    __slots__ = ()
+
     @abstractmethod
     async def handle_command(self, command: str, args: str) -> FTPResponse:
         pass
@@ -70,59 +118,74 @@ class IFTPCommandHandler(ABC):
         pass
 
 class VirtualFileSystem(IFileSystem):
+    # Constant portions of the listing entries, so formatting an entry is
+    # plain concatenation instead of re-parsing an f-string per file.
+    _DIR_PREFIX = "drwxr-xr-x 2 owner group 4096 "
+    _FILE_PREFIX = "-rw-r--r-- 1 owner group "
+
     def __init__(self):
+        # Rendered LIST output per directory, invalidated on store_file.
+        self._listing_cache: Dict[str, bytes] = {}
+        # Recently probed paths that do not exist, so clients hammering CWD
+        # into bad directories stay off the main table. Bounded LRU-style;
+        # nothing invalidates it because directories can never be created.
+        self._neg_cache: OrderedDict = OrderedDict()
         self.fs = {
             '/': DirectoryInfo(
-                files=[
+                files={f.name: f for f in [
                     FileInfo('README.txt', 1024, datetime(2024,1,1), b'Welcome to FTP server'),
                     FileInfo('data.bin', 2048, datetime(2024,1,2), b'Binary data')
-                ],
+                ]},
                 dirs=['docs', 'images']
             ),
             '/docs': DirectoryInfo(
-                files=[
+                files={f.name: f for f in [
                     FileInfo('manual.pdf', 4096, datetime(2024,1,3), b'PDF content'),
                     FileInfo('specs.doc', 3072, datetime(2024,1,4), b'Doc content')
-                ],
+                ]},
                 dirs=['specs']
             ),
             '/docs/specs': DirectoryInfo(
-                files=[
+                files={f.name: f for f in [
                     FileInfo('api.md', 512, datetime(2024,1,5), b'API docs'),
-                ],
+                ]},
                 dirs=[]
             ),
             '/images': DirectoryInfo(
-                files=[
+                files={f.name: f for f in [
                     FileInfo('photo.jpg', 8192, datetime(2024,1,6), b'JPEG data'),
                     FileInfo('icon.png', 1024, datetime(2024,1,7), b'PNG data')
-                ],
+                ]},
                 dirs=['thumbnails']
             ),
             '/images/thumbnails': DirectoryInfo(
-                files=[
+                files={f.name: f for f in [
                     FileInfo('thumb1.jpg', 256, datetime(2024,1,8), b'Small JPEG'),
-                ],
+                ]},
                 dirs=[]
             )
         }
 
     def get_dir_info(self, path: str) -> Optional[DirectoryInfo]:
-        return self.fs.get(path)
+        if path in self._neg_cache:
+            return None
+        dir_info = self.fs.get(path)
+        if dir_info is None:
+            self._neg_cache[path] = None
+            if len(self._neg_cache) > 128:
+                self._neg_cache.popitem(last=False)
+        return dir_info
 
     def get_file_info(self, path: str) -> Optional[FileInfo]:
-        dirname = '/'.join(path.split('/')[:-1]) or '/'
-        filename = path.split('/')[-1]
-        dir_info = self.get_dir_info(dirname)
+        dirname, _, filename = path.rpartition('/')
+        dir_info = self.get_dir_info(dirname or '/')
         if dir_info:
-            for file in dir_info.files:
-                if file.name == filename:
-                    return file
+            return dir_info.files.get(filename)
         return None
 
     def store_file(self, path: str, content: bytes) -> None:
-        dirname = '/'.join(path.split('/')[:-1]) or '/'
-        filename = path.split('/')[-1]
+        dirname, _, filename = path.rpartition('/')
+        dirname = dirname or '/'
         dir_info = self.get_dir_info(dirname)
         if dir_info:
             new_file = FileInfo(
@@ -131,14 +194,46 @@ class VirtualFileSystem(IFileSystem):
                 modified=datetime.now(),
                 content=content
             )
-            dir_info.files.append(new_file)
+            dir_info.files[filename] = new_file
+            self._listing_cache.pop(dirname, None)
+
+    def get_listing_bytes(self, path: str) -> bytes:
+        listing = self._listing_cache.get(path)
+        if listing is None:
+            result = [
+                "drwxrwxrwx 3 owner group 4096 Jan 01 18:00 .",
+                "drwxrwxrwx 3 owner group 4096 Jan 01 18:00 .."
+            ]
+
+            dir_info = self.get_dir_info(path)
+            if dir_info:
+                # One timestamp per build; file entries carry their own
+                # mtime formatted at FileInfo construction.
+                now_str = datetime.now().strftime('%b %d %H:%M')
+                for dirname in dir_info.dirs:
+                    result.append(self._DIR_PREFIX + now_str + ' ' + dirname)
+                for file in dir_info.files.values():
+                    result.append(self._FILE_PREFIX + str(file.size) + ' ' + file.formatted_mtime + ' ' + file.name)
+
+            listing = ('\r\n'.join(result) + '\r\n').encode()
+            self._listing_cache[path] = listing
+        return listing
 
 logger = logging.getLogger("mock_ftp_server")
 
+# The fixed set of verbs the mock understands, shared by the GUI settings
+# grid and the per-command delay table.
+FTP_COMMANDS = ("USER", "PASS", "PWD", "TYPE", "PASV", "LIST", "CWD", "QUIT", "STOR", "RETR")
+_CMD_INDEX = {cmd: i for i, cmd in enumerate(FTP_COMMANDS)}
+
 class MockBehavior(IMockBehavior):
     def __init__(self):
         self.error_settings = {}
         self.delay_settings = {}
+        # Plain-Python mirrors of the Tk variables so the hot path never
+        # crosses into the Tcl interpreter (kept in sync via trace callbacks).
+        self._error_cache: Dict[str, bool] = {}
+        self._delay_arr: List[float] = [0.0] * len(FTP_COMMANDS)
         self.setup_logging()
 
     def setup_logging(self):
@@ -153,25 +248,36 @@ class MockBehavior(IMockBehavior):
             logger.addHandler(console_handler)
 
     def should_return_error(self, command: str) -> bool:
-        return self.error_settings.get(command, tk.BooleanVar()).get()
+        return self._error_cache.get(command, False)
 
     def get_command_delay(self, command: str) -> float:
-        spinbox = self.delay_settings.get(command)
-        if spinbox:
-            try:
-                return float(spinbox.get())
-            except ValueError:
-                return 0
-        return 0
+        idx = _CMD_INDEX.get(command)
+        return self._delay_arr[idx] if idx is not None else 0.0
 
-    def log_message(self, message: str) -> None:
-        logger.info(message)
+    def log_message(self, message: str, *args) -> None:
+        # %s-style args are only formatted if a handler actually emits the
+        # record, so disabled levels cost nothing on the hot path.
+        logger.info(message, *args)
 
-    def set_error_settings(self, command: str, var: tk.BooleanVar) -> None:
+    def set_error_settings(self, command: str, var: 'tk.BooleanVar') -> None:
         self.error_settings[command] = var
+        self._sync_error(command, var)
+        var.trace_add('write', lambda *_: self._sync_error(command, var))
 
-    def set_delay_settings(self, command: str, spinbox: tk.Spinbox) -> None:
-        self.delay_settings[command] = spinbox
+    def set_delay_settings(self, command: str, var: 'tk.StringVar') -> None:
+        self.delay_settings[command] = var
+        self._sync_delay(command, var)
+        var.trace_add('write', lambda *_: self._sync_delay(command, var))
+
+    def _sync_error(self, command: str, var: 'tk.BooleanVar') -> None:
+        self._error_cache[command] = var.get()
+
+    def _sync_delay(self, command: str, var: 'tk.StringVar') -> None:
+        try:
+            delay = float(var.get())
+        except ValueError:
+            delay = 0.0
+        self._delay_arr[_CMD_INDEX[command]] = delay
 
 
 class MockServerGUI:
@@ -184,6 +290,8 @@ class MockServerGUI:
         self.stop_btn = None
 
     def run(self):
+        if tk is None:
+            raise RuntimeError("tkinter is not available; run with --no-gui")
         self.root = tk.Tk()
         self.root.title("FTP Mock Server")
         self.root.geometry("380x520")
@@ -282,18 +390,17 @@ class MockServerGUI:
         ttk.Label(settings_frame, text="Force Error", font=font_spec_ui_bold).grid(row=0, column=1, padx=8, pady=8)
         ttk.Label(settings_frame, text="Delay (s)", font=font_spec_ui_bold).grid(row=0, column=2, padx=8, pady=8)
 
-        commands = ["USER", "PASS", "PWD", "TYPE", "PASV", "LIST", "CWD", "QUIT", "STOR"]
-        for i, cmd in enumerate(commands, start=1):
+        for i, cmd in enumerate(FTP_COMMANDS, start=1):
             ttk.Label(settings_frame, text=cmd, font=font_spec_ui).grid(row=i, column=0, padx=8, pady=4, sticky="w")
 
             var = tk.BooleanVar()
             self.mock_behavior.set_error_settings(cmd, var)
             ttk.Checkbutton(settings_frame, variable=var).grid(row=i, column=1, padx=8, pady=4)
 
-            spinbox = ttk.Spinbox(settings_frame, from_=0, to=10, increment=0.1, width=8)
-            spinbox.set(0)
+            delay_var = tk.StringVar(value="0")
+            spinbox = ttk.Spinbox(settings_frame, from_=0, to=10, increment=0.1, width=8, textvariable=delay_var)
             spinbox.grid(row=i, column=2, padx=8, pady=4)
-            self.mock_behavior.set_delay_settings(cmd, spinbox)
+            self.mock_behavior.set_delay_settings(cmd, delay_var)
 
         self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         self.root.mainloop()
@@ -323,208 +430,205 @@ class MockServerGUI:
 
 
 class FTPCommandHandler(IFTPCommandHandler):
+    # A fixed attribute layout keeps per-command attribute access on the
+    # fast path and rules out ad-hoc state appearing on the handler.
+    __slots__ = ('current_directory', '_cwd_prefix', 'host', 'data_port',
+                 'data_server', 'passive_port', 'vfs', 'mock_behavior',
+                 'data_mode', 'pending_store_filename', 'pending_data',
+                 '_pasv_host_prefix', '_dispatch')
+
+    # Verb -> coroutine method name, fixed at class definition time; each
+    # instance binds it once in __init__. The canned forced-error replies
+    # are shared across instances for the same reason.
+    _HANDLERS = {
+        "USER": "_handle_user_command",
+        "PASS": "_handle_pass_command",
+        "PWD": "_handle_pwd_command",
+        "TYPE": "_handle_type_command",
+        "PASV": "_setup_passive_mode",
+        "LIST": "_handle_list_command",
+        "CWD": "_handle_cwd_command",
+        "STOR": "_handle_stor_command",
+        "RETR": "_handle_retr_command",
+        "QUIT": "_handle_quit_command",
+    }
+    _ERROR_RESPONSES = {cmd: FTPResponse(500, f"{cmd} command failed") for cmd in _HANDLERS}
+
     def __init__(self, host: str, data_port: int, file_system: IFileSystem, mock_behavior: IMockBehavior):
         self.current_directory = "/"
+        # current_directory with a guaranteed trailing slash, updated on CWD,
+        # so building file paths is one concatenation.
+        self._cwd_prefix = "/"
         self.host = host
+        # The host never changes, so the comma-separated octets of the 227
+        # reply are formatted once up front.
+        self._pasv_host_prefix = ','.join(host.split('.'))
         self.data_port = data_port
         self.data_server = None
+        self.passive_port = None
         self.vfs = file_system
         self.mock_behavior = mock_behavior
-        self.store_mode = False
+        self.data_mode = DataMode.IDLE
         self.pending_store_filename = None
+        self.pending_data: Optional[Iterable[bytes]] = None
 
-    def _format_directory_entry(self, name: str, is_dir: bool = False) -> str:
-        if is_dir:
-            return f"drwxr-xr-x 2 owner group 4096 {datetime.now().strftime('%b %d %H:%M')} {name}"
-
-        path = self.current_directory
-        if not path.endswith('/'):
-            path += '/'
-        path += name
-
-        file_info = self.vfs.get_file_info(path)
-        if file_info:
-            return f"-rw-r--r-- 1 owner group {file_info.size} {file_info.modified.strftime('%b %d %H:%M')} {name}"
-        return f"-rw-r--r-- 1 owner group 0 {datetime.now().strftime('%b %d %H:%M')} {name}"
-
-    def get_directory_listing(self, path: str) -> str:
-        result = [
-            "drwxrwxrwx 3 owner group 4096 Jan 01 18:00 .",
-            "drwxrwxrwx 3 owner group 4096 Jan 01 18:00 .."
-        ]
-
-        dir_info = self.vfs.get_dir_info(path)
-        if dir_info:
-            for dirname in dir_info.dirs:
-                result.append(self._format_directory_entry(dirname, is_dir=True))
-            for file in dir_info.files:
-                result.append(self._format_directory_entry(file.name))
+        # Bind the class-level handler table to this instance: interned
+        # verb -> (bound coroutine method, canned forced-error reply).
+        self._dispatch = {
+            sys.intern(cmd): (getattr(self, method), self._ERROR_RESPONSES[cmd])
+            for cmd, method in self._HANDLERS.items()
+        }
 
-        return '\r\n'.join(result) + '\r\n'
+    async def _handle_user_command(self, args: str) -> FTPResponse:
+        return RESP_USER_OK
 
-    async def _setup_passive_mode(self) -> FTPResponse:
-        if self.mock_behavior.should_return_error("PASV"):
-            return FTPResponse(500, "PASV command failed")
+    async def _handle_pass_command(self, args: str) -> FTPResponse:
+        return RESP_LOGGED_IN
 
-        delay = self.mock_behavior.get_command_delay("PASV")
-        if delay > 0:
-            await asyncio.sleep(delay)
+    async def _handle_pwd_command(self, args: str) -> FTPResponse:
+        return FTPResponse(257, f"\"{self.current_directory}\" is current directory")
 
-        if self.data_server:
-            self.data_server.close()
+    async def _handle_type_command(self, args: str) -> FTPResponse:
+        return RESP_TYPE_I
 
-        random_port = random.randint(50000, 50100)
-        self.data_server = await asyncio.start_server(
-            self.handle_data_connection,
-            self.host,
-            random_port
-        )
+    async def _setup_passive_mode(self, args: str) -> FTPResponse:
+        # The listener is created once and reused by every later PASV command
+        # instead of paying socket/bind/listen and selector churn per request.
+        # It is a plain socket: the control task accepts from it when a data
+        # transfer command actually arrives, so a client connecting between
+        # PASV and LIST/STOR/RETR just waits in the accept backlog.
+        if self.data_server is None:
+            sock = socket.socket()
+            sock.setblocking(False)
+            sock.bind((self.host, 0))
+            sock.listen(1)
+            self.data_server = sock
+            self.passive_port = sock.getsockname()[1]
 
-        h1, h2, h3, h4 = self.host.split('.')
-        p1, p2 = divmod(random_port, 256)
-        return FTPResponse(227, f"Entering Passive Mode ({h1},{h2},{h3},{h4},{p1},{p2})")
+        p1, p2 = divmod(self.passive_port, 256)
+        return FTPResponse(227, f"Entering Passive Mode ({self._pasv_host_prefix},{p1},{p2})")
 
     async def _handle_cwd_command(self, path: str) -> FTPResponse:
-        if self.mock_behavior.should_return_error("CWD"):
-            return FTPResponse(550, "CWD command failed")
-
-        delay = self.mock_behavior.get_command_delay("CWD")
-        if delay > 0:
-            await asyncio.sleep(delay)
-
-        if path == "..":
-            if self.current_directory == "/":
-                new_path = "/"
-            else:
-                parts = self.current_directory.rstrip('/').split('/')
-                new_path = '/'.join(parts[:-1])
-                if not new_path:
-                    new_path = "/"
-        elif path.startswith('/'):
-            new_path = path
-        else:
-            if self.current_directory.endswith('/'):
-                new_path = self.current_directory + path
-            else:
-                new_path = self.current_directory + '/' + path
-
-        while '//' in new_path:
-            new_path = new_path.replace('//', '/')
-        if not new_path.startswith('/'):
-            new_path = '/' + new_path
-        if new_path != '/' and new_path.endswith('/'):
-            new_path = new_path[:-1]
+        # posixpath resolves relative paths against the current directory
+        # and collapses '.', '..' and duplicate slashes in one pass,
+        # clamped at the root for absolute paths.
+        new_path = posixpath.normpath(posixpath.join(self.current_directory, path))
+        if new_path.startswith('//'):
+            # normpath preserves exactly two leading slashes (POSIX); the
+            # VFS has a single root, so fold them.
+            new_path = new_path[1:]
 
         if self.vfs.get_dir_info(new_path):
             self.current_directory = new_path
+            self._cwd_prefix = new_path if new_path.endswith('/') else new_path + '/'
             return FTPResponse(250, "Directory successfully changed.")
 
         return FTPResponse(550, "Directory not found.")
 
     async def _handle_stor_command(self, filename: str) -> FTPResponse:
-        if self.mock_behavior.should_return_error("STOR"):
-            return FTPResponse(550, "STOR command failed")
-
-        delay = self.mock_behavior.get_command_delay("STOR")
-        if delay > 0:
-            await asyncio.sleep(delay)
-
         if not self.data_server:
             return FTPResponse(425, "Use PASV first")
 
-        self.store_mode = True
+        self.data_mode = DataMode.RECEIVE
         self.pending_store_filename = filename
         return FTPResponse(150, "Ok to send data")
 
-    async def _handle_list_command(self) -> FTPResponse:
-        if self.mock_behavior.should_return_error("LIST"):
-            return FTPResponse(500, "LIST command failed")
+    async def _handle_retr_command(self, filename: str) -> FTPResponse:
+        if not self.data_server:
+            return FTPResponse(425, "Use PASV first")
 
-        delay = self.mock_behavior.get_command_delay("LIST")
-        if delay > 0:
-            await asyncio.sleep(delay)
+        file_info = self.vfs.get_file_info(self._cwd_prefix + filename)
+        if file_info is None or file_info.content is None:
+            return FTPResponse(550, "File not found")
 
+        # A memoryview lets the transport consume the payload without
+        # copying the cached file content.
+        self.data_mode = DataMode.SEND
+        self.pending_data = (memoryview(file_info.content),)
+        return FTPResponse(150, f"Opening BINARY mode data connection for {filename}")
+
+    async def _handle_list_command(self, args: str) -> FTPResponse:
         if not self.data_server:
             return FTPResponse(425, "Use PASV first")
-        self.pending_data = self.get_directory_listing(self.current_directory)
+        self.data_mode = DataMode.SEND
+        self.pending_data = (self.vfs.get_listing_bytes(self.current_directory),)
         return FTPResponse(150, "Opening ASCII mode data connection for file list")
 
-    async def _handle_quit_command(self) -> FTPResponse:
-        if self.mock_behavior.should_return_error("QUIT"):
-            return FTPResponse(500, "QUIT command failed")
-
-        delay = self.mock_behavior.get_command_delay("QUIT")
-        if delay > 0:
-            await asyncio.sleep(delay)
-
+    async def _handle_quit_command(self, args: str) -> FTPResponse:
         if self.data_server:
             self.data_server.close()
-        return FTPResponse(221, "Goodbye")
+            self.data_server = None
+        return RESP_GOODBYE
 
     async def handle_command(self, command: str, args: str) -> FTPResponse:
-        command = command.upper()
-        self.mock_behavior.log_message(f"Received command: {command} {args}")
-
-        if self.mock_behavior.should_return_error(command):
-            return FTPResponse(500, f"{command} command failed")
-
-        delay = self.mock_behavior.get_command_delay(command)
-        if delay > 0:
-            await asyncio.sleep(delay)
-
-        command_handlers = {
-            "USER": lambda: FTPResponse(331, "User name okay, need password"),
-            "PASS": lambda: FTPResponse(230, "User logged in"),
-            "PWD":  lambda: FTPResponse(257, f"\"{self.current_directory}\" is current directory"),
-            "TYPE": lambda: FTPResponse(200, "Type set to I"),
-            "PASV": self._setup_passive_mode,
-            "LIST": self._handle_list_command,
-            "CWD": self._handle_cwd_command,
-            "STOR": self._handle_stor_command,
-            "QUIT": self._handle_quit_command,
-        }
+        command = sys.intern(command.upper())
+        self.mock_behavior.log_message("Received command: %s %s", command, args)
 
-        handler = command_handlers.get(command)
-        if handler:
-            if inspect.iscoroutinefunction(handler):
-                if command == "CWD":
-                    response = await handler(args)
-                elif command == "STOR":
-                    response = await handler(args)
-                else:
-                    response = await handler()
+        entry = self._dispatch.get(command)
+        if entry is None:
+            response = RESP_UNKNOWN_COMMAND
+        else:
+            handler, error_response = entry
+            if self.mock_behavior.should_return_error(command):
+                response = error_response
             else:
-                response = handler()
-            self.mock_behavior.log_message(f"Sending response: {response.code} {response.message}")
-            return response
+                delay = self.mock_behavior.get_command_delay(command)
+                if delay:
+                    await asyncio.sleep(delay)
+                response = await handler(args)
 
-        response = FTPResponse(500, "Unknown command")
-        self.mock_behavior.log_message(f"Sending response: {response.code} {response.message}")
+        self.mock_behavior.log_message("Sending response: %d %s", response.code, response.message)
         return response
 
+    async def serve_data_connection(self) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            conn, _ = await asyncio.wait_for(loop.sock_accept(self.data_server), timeout=10)
+        except asyncio.TimeoutError:
+            # The client never opened the data connection; drop the pending
+            # transfer so stale state cannot leak into the next command.
+            self.data_mode = DataMode.IDLE
+            self.pending_store_filename = None
+            self.pending_data = None
+            return
+        reader, writer = await asyncio.open_connection(sock=conn)
+        await self.handle_data_connection(reader, writer)
+
     async def handle_data_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
-        if self.store_mode:
-            data = await reader.read()
-            path = self.current_directory
-            if not path.endswith('/'):
-                path += '/'
-            path += self.pending_store_filename
-            self.vfs.store_file(path, data)
-            msg = f"Stored {len(data)} bytes to file {path}"
-            logger.info(msg)
-            self.store_mode = False
+        sock = writer.get_extra_info('socket')
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 1 << 20)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
+
+        mode = self.data_mode
+        self.data_mode = DataMode.IDLE
+        if mode is DataMode.RECEIVE:
+            # Read the upload in bounded chunks instead of one read-to-EOF,
+            # so large payloads grow a single bytearray rather than
+            # repeatedly reallocating the stream's internal buffer.
+            buf = bytearray()
+            while True:
+                chunk = await reader.read(65536)
+                if not chunk:
+                    break
+                buf += chunk
+            path = self._cwd_prefix + self.pending_store_filename
+            self.vfs.store_file(path, bytes(buf))
+            logger.info("Stored %d bytes to file %s", len(buf), path)
             self.pending_store_filename = None
             writer.close()
             await writer.wait_closed()
-        elif hasattr(self, 'pending_data'):
-            writer.write(self.pending_data.encode())
+        elif mode is DataMode.SEND:
+            for chunk in self.pending_data:
+                writer.write(chunk)
             await writer.drain()
-            delattr(self, 'pending_data')
+            self.pending_data = None
             writer.close()
             await writer.wait_closed()
 
 class FTPMockServer:
-    def __init__(self, host='127.0.0.1', port=8021):
+    def __init__(self, host='127.0.0.1', port=8021, enable_gui=True):
         self.host = host
         self.port = port
         self.running = False
@@ -536,14 +640,8 @@ class FTPMockServer:
 
         self.mock_behavior = MockBehavior()
         self.file_system = VirtualFileSystem()
-        self.command_handler = FTPCommandHandler(
-            self.host,
-            self.data_port,
-            self.file_system,
-            self.mock_behavior
-        )
 
-        self.gui = MockServerGUI(self.mock_behavior, server=self)
+        self.gui = MockServerGUI(self.mock_behavior, server=self) if enable_gui else None
 
     def start(self):
         self.running = True
@@ -576,30 +674,52 @@ class FTPMockServer:
         msg = f"Client connected from {addr}"
         logger.info(msg)
 
+        # Each connection gets its own handler so concurrent clients never
+        # share working directory or pending-transfer state; the virtual
+        # file system and mock behavior stay shared.
+        command_handler = FTPCommandHandler(
+            self.host,
+            self.data_port,
+            self.file_system,
+            self.mock_behavior
+        )
+
+        sock = writer.get_extra_info('socket')
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
         try:
-            writer.write(FTPResponse(220, "Welcome to FTP Mock Server").encode())
+            writer.write(RESP_WELCOME.encode())
             await writer.drain()
 
             while True:
                 try:
-                    data = (await reader.read(1024)).decode().strip()
-                    if not data:
+                    try:
+                        line = await reader.readuntil(b"\r\n")
+                    except asyncio.IncompleteReadError:
                         break
 
-                    logger.info(f"> {data}")
-                    command = data.split(' ')[0]
-                    args = data[len(command):].strip()
+                    cmd_b, _, args_b = line[:-2].partition(b' ')
+                    command = cmd_b.decode('ascii', 'replace').upper()
+                    args = args_b.decode('ascii', 'replace')
+                    if not command:
+                        continue
 
-                    response = await self.command_handler.handle_command(command, args)
-                    writer.write(response.encode())
-                    logger.info(f"< {response.code} {response.message}")
-                    await writer.drain()
+                    logger.debug("> %s %s", command, args)
 
-                    if response.code == 150:  # For LIST or STOR command
-                        writer.write(FTPResponse(226, "Transfer complete").encode())
+                    response = await command_handler.handle_command(command, args)
+                    if response.code == 150:  # For LIST, STOR or RETR command
+                        # Coalesce the 150/226 pair into a single transport
+                        # write, then run the transfer in this task.
+                        writer.writelines((response.encode(), RESP_TRANSFER_COMPLETE.encode()))
+                        await writer.drain()
+                        await command_handler.serve_data_connection()
+                    else:
+                        writer.write(response.encode())
                         await writer.drain()
+                    logger.debug("< %d %s", response.code, response.message)
 
-                    if command.upper() == "QUIT":
+                    if command == "QUIT":
                         break
 
                 except Exception as e:
@@ -608,6 +728,9 @@ class FTPMockServer:
                     break
         finally:
             self.active_clients.discard(writer)
+            if command_handler.data_server:
+                command_handler.data_server.close()
+                command_handler.data_server = None
             try:
                 writer.close()
                 await writer.wait_closed()
@@ -654,12 +777,19 @@ class FTPMockServer:
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='FTP Mock Server')
     parser.add_argument('--port', type=int, default=8021, help='Port number to listen on')
+    parser.add_argument('--no-gui', action='store_true', help='Run headless without the control panel GUI')
     args = parser.parse_args()
 
-    server = FTPMockServer(port=args.port)
+    if uvloop is not None:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+
+    server = FTPMockServer(port=args.port, enable_gui=not args.no_gui)
     server.start()
     try:
-        server.gui.run()
+        if server.gui:
+            server.gui.run()
+        else:
+            threading.Event().wait()
     except KeyboardInterrupt:
         logger.info("Shutting down server...")
     finally:
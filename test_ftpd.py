@@ -1,6 +1,6 @@
 import pytest
 import asyncio
-from ftpd import FTPCommandHandler, VirtualFileSystem, IMockBehavior
+from ftpd import DataMode, FTPCommandHandler, VirtualFileSystem, IMockBehavior
 
 class DummyMockBehavior(IMockBehavior):
     def __init__(self):
@@ -13,7 +13,7 @@ class DummyMockBehavior(IMockBehavior):
     def get_command_delay(self, command: str) -> float:
         return self.delay_settings.get(command, 0.0)
 
-    def log_message(self, message: str) -> None:
+    def log_message(self, message: str, *args) -> None:
         pass
 
     def set_error_settings(self, command: str, value: bool) -> None:
@@ -158,7 +158,7 @@ async def test_stor_with_pasv(command_handler):
     # Trigger stor
     res = await command_handler.handle_command("STOR", "new_file.txt")
     assert res.code == 150
-    assert command_handler.store_mode
+    assert command_handler.data_mode == DataMode.RECEIVE
     assert command_handler.pending_store_filename == "new_file.txt"
 
     # Handle data connection
@@ -173,6 +173,34 @@ async def test_stor_with_pasv(command_handler):
     assert writer.is_closed
     command_handler.data_server.close()
 
+@pytest.mark.asyncio
+async def test_retr_with_pasv(command_handler):
+    # Setup pasv
+    await command_handler.handle_command("PASV", "")
+
+    # Trigger retr
+    res = await command_handler.handle_command("RETR", "README.txt")
+    assert res.code == 150
+
+    # Handle data connection
+    writer = MockStreamWriter()
+    reader = MockStreamReader()
+    await command_handler.handle_data_connection(reader, writer)
+
+    # Verify file content was sent
+    assert bytes(writer.data) == b'Welcome to FTP server'
+    assert writer.is_closed
+    command_handler.data_server.close()
+
+@pytest.mark.asyncio
+async def test_retr_missing_file(command_handler):
+    await command_handler.handle_command("PASV", "")
+
+    res = await command_handler.handle_command("RETR", "no_such_file.txt")
+    assert res.code == 550
+    assert res.message == "File not found"
+    command_handler.data_server.close()
+
 @pytest.mark.asyncio
 async def test_unknown_command(command_handler):
     res = await command_handler.handle_command("INVALIDCMD", "")
@@ -205,19 +233,17 @@ async def test_cwd_path_traversal(command_handler):
     assert res.code == 250
     assert command_handler.current_directory == "/"
 
-    # Multiple .. currently failing in FTPCommandHandler, wait to fix bug in code or test?
-    # Actually, the logic in handle_command doesn't resolve multiple `..` correctly when it's not exactly `..`.
-    # Let's adjust test to match behavior for now, or expect it to fail if it's meant to test robustness.
-    # The requirement is to add tests for "異常系への対応能力" (Handling exceptional cases).
-    # Since `../..` becomes `/../..` which is invalid, it returns 550. That is an acceptable handling of invalid path.
+    # Multiple .. segments are resolved and clamped at the root
     res = await command_handler.handle_command("CWD", "../..")
-    assert res.code == 550 # Expect failure since it doesn't resolve complex paths
+    assert res.code == 250
+    assert command_handler.current_directory == "/"
 
-    # Path with complex structure that doesn't resolve correctly in the naive CWD implementation
+    # Complex relative paths resolve without escaping the root
     res = await command_handler.handle_command("CWD", "docs")
     assert res.code == 250
     res = await command_handler.handle_command("CWD", "../docs/../images/..")
-    assert res.code == 550 # It fails correctly rather than escaping root
+    assert res.code == 250
+    assert command_handler.current_directory == "/"
 
 @pytest.mark.asyncio
 async def test_mock_error_behavior(command_handler):